@@ -11,6 +11,7 @@ from tidalcord.tidalcord import TidalCord
 from tidalcord.tidalsession import TidalSession
 from tidalcord.urlhandler import UrlHandler
 from tidalcord.lru_cache import LRUCache
+from tidalcord.track_index import TrackIndex
 
 
 async def main():
@@ -37,9 +38,10 @@ async def main():
     if not tidal_session.logged_in:
         raise TidalLoginError("Failed to log in to Tidal.")
 
-    # Initialize URL handler and cache
+    # Initialize URL handler, cache and track index
     urlhandler = UrlHandler(tidal_session)
     cache = LRUCache("music_cache", max_size=5 * 1024**3)
+    track_index = TrackIndex("music_cache_index.json")
 
     # Configure bot intents
     intents = discord.Intents.default()
@@ -49,7 +51,7 @@ async def main():
     bot = commands.Bot(command_prefix="!", intents=intents)
 
     # Add TidalCord cog
-    await bot.add_cog(TidalCord(bot, tidal_session, urlhandler, cache))
+    await bot.add_cog(TidalCord(bot, tidal_session, urlhandler, cache, track_index))
 
     # Start the bot
     await bot.start(token)
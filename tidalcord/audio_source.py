@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import discord
+from discord.opus import Encoder
+
+
+class TrackAudioSource(discord.PCMVolumeTransformer):
+    def __init__(self, file_path: Path, volume: float = 1.0, offset: float = 0.0):
+        # Input-side -ss lets FFmpeg jump straight to the offset in the file
+        before_options = f"-ss {offset:.3f}" if offset else None
+        super().__init__(
+            discord.FFmpegPCMAudio(str(file_path), before_options=before_options),
+            volume=volume,
+        )
+        self.file_path = file_path
+        self.offset = offset
+        self.frames_read = 0
+
+    @property
+    def position(self) -> float:
+        return self.offset + self.frames_read * Encoder.FRAME_LENGTH / 1000
+
+    def read(self) -> bytes:
+        data = super().read()
+        if data:
+            self.frames_read += 1
+        return data
+
+    def seek(self, offset: float) -> "TrackAudioSource":
+        return TrackAudioSource(self.file_path, volume=self.volume, offset=offset)
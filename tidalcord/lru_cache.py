@@ -26,6 +26,9 @@ class LRUCache:
                     f.write(chunk)
         self.evict_if_needed()
 
+    def __contains__(self, key: str) -> bool:
+        return (self.cache_dir / key).is_file()
+
     def get(self, key: str) -> Path:
         file_path = self.cache_dir / key
         if file_path.exists():
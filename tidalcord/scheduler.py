@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+logger = logging.getLogger("TidalCord")
+
+
+class DeadlineScheduler:
+    def __init__(self):
+        # guild_id -> {name: asyncio.TimerHandle}
+        self.timers = defaultdict(dict)
+        self.running = set()
+
+    def schedule(
+        self,
+        guild_id: int,
+        name: str,
+        delay: float,
+        callback: Callable[[], Awaitable[None]],
+    ):
+        # Deadlines live in the event loop's own timer heap, so a pending
+        # deadline costs no wakeups until it is due and cancelling is O(1)
+        self.cancel(guild_id, name)
+        loop = asyncio.get_running_loop()
+        self.timers[guild_id][name] = loop.call_later(
+            delay, self._fire, guild_id, name, callback
+        )
+
+    def is_scheduled(self, guild_id: int, name: str) -> bool:
+        return name in self.timers.get(guild_id, ())
+
+    def cancel(self, guild_id: int, name: str) -> bool:
+        guild_timers = self.timers.get(guild_id)
+        if not guild_timers or name not in guild_timers:
+            return False
+        guild_timers.pop(name).cancel()
+        if not guild_timers:
+            del self.timers[guild_id]
+        return True
+
+    def cancel_all(self, guild_id: int):
+        for handle in self.timers.pop(guild_id, {}).values():
+            handle.cancel()
+
+    def close(self):
+        for guild_id in list(self.timers):
+            self.cancel_all(guild_id)
+        for task in self.running:
+            task.cancel()
+
+    def _fire(self, guild_id: int, name: str, callback):
+        self.timers[guild_id].pop(name, None)
+        if not self.timers[guild_id]:
+            del self.timers[guild_id]
+        task = asyncio.create_task(callback())
+        self.running.add(task)
+        task.add_done_callback(self._finish)
+
+    def _finish(self, task: asyncio.Task):
+        self.running.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Scheduled task failed: {task.exception()!r}")
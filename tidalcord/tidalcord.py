@@ -4,29 +4,39 @@ import requests
 import signal
 import logging
 
-from discord.ext import commands, tasks
+from discord import app_commands
+from discord.ext import commands
 import discord
 
+from tidalcord.audio_source import TrackAudioSource
 from tidalcord.lru_cache import LRUCache
+from tidalcord.scheduler import DeadlineScheduler
 from tidalcord.tidalsession import TidalSession
-from tidalcord.urlhandler import UrlHandler
+from tidalcord.track_index import TrackIndex
+from tidalcord.urlhandler import TidalUrl, UrlHandler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("TidalCord")
 
 
 class TidalCord(commands.Cog):
+    EMPTY_CHANNEL_TIMEOUT = 10
+    NO_TRACK_TIMEOUT = 300
+
     def __init__(
         self,
         bot: commands.Bot,
         session: TidalSession,
         urlhandler: UrlHandler,
         cache: LRUCache,
+        track_index: TrackIndex,
     ):
         self.bot = bot
         self.session = session
         self.urlhandler = urlhandler
         self.cache = cache
+        self.track_index = track_index
+        self.tree_synced = False
 
         self.current_track = None
         self.is_paused = False
@@ -34,9 +44,9 @@ class TidalCord(commands.Cog):
         self.music_queue = []
         self.voice_client = None
         self.current_volume = 0.5
+        self.scheduler = DeadlineScheduler()
 
         signal.signal(signal.SIGINT, self.signal_handler)
-        self.pre_download_tracks_task.start()
 
         logger.info("TidalCord initialized")
 
@@ -44,6 +54,37 @@ class TidalCord(commands.Cog):
         logger.info("Received SIGINT. Shutting down...")
         asyncio.create_task(self.bot.close())
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if self.tree_synced:
+            return
+        await self.bot.tree.sync()
+        self.tree_synced = True
+        logger.info("Application commands synced")
+
+    async def cog_unload(self):
+        self.scheduler.close()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(
+        self,
+        member: discord.Member,
+        before: discord.VoiceState,
+        after: discord.VoiceState,
+    ):
+        if not self.voice_client or member.guild != self.voice_client.guild:
+            return
+        if member == self.bot.user and after.channel is None:
+            # Disconnected from outside the bot, e.g. kicked from the channel
+            self.scheduler.cancel_all(member.guild.id)
+            self.voice_client = None
+            self.music_queue.clear()
+            self.current_track = None
+            return
+        channel = self.voice_client.channel
+        if channel in (before.channel, after.channel):
+            self.check_empty_channel()
+
     async def join_voice_channel(self, ctx: commands.Context):
         if not ctx.author.voice or not ctx.author.voice.channel:
             await ctx.send("You must be in a voice channel.")
@@ -51,29 +92,61 @@ class TidalCord(commands.Cog):
         channel = ctx.author.voice.channel
         if not self.voice_client or not self.voice_client.is_connected():
             self.voice_client = await channel.connect()
-            self.auto_disconnect_empty_channel_task.start()
         elif self.voice_client.channel != channel:
             await self.voice_client.move_to(channel)
+        self.check_empty_channel()
         return True
 
+    async def leave_voice_channel(self):
+        guild_id = self.voice_client.guild.id
+        await self.voice_client.disconnect()
+        self.voice_client = None
+        self.scheduler.cancel_all(guild_id)
+
+    def check_empty_channel(self):
+        guild_id = self.voice_client.guild.id
+        if len(self.voice_client.channel.members) > 1:
+            self.scheduler.cancel(guild_id, "empty_channel")
+        elif not self.scheduler.is_scheduled(guild_id, "empty_channel"):
+            self.scheduler.schedule(
+                guild_id,
+                "empty_channel",
+                self.EMPTY_CHANNEL_TIMEOUT,
+                self.auto_disconnect_empty_channel,
+            )
+
+    def schedule_pre_download(self):
+        if self.voice_client:
+            self.scheduler.schedule(
+                self.voice_client.guild.id, "pre_download", 0, self.pre_download_tracks
+            )
+
     async def play_next(self):
         if not self.music_queue:
             self.current_track = None
-            asyncio.create_task(self.start_auto_disconnect_no_track_task())
+            if self.voice_client:
+                self.scheduler.schedule(
+                    self.voice_client.guild.id,
+                    "no_track",
+                    self.NO_TRACK_TIMEOUT,
+                    self.auto_disconnect_no_track,
+                )
             return
-        self.auto_disconnect_no_track_task.cancel()
+        if self.voice_client:
+            self.scheduler.cancel(self.voice_client.guild.id, "no_track")
         track = self.music_queue.pop(0)
         await self.play_track(track)
 
     async def play_track(self, track: dict):
+        if not self.voice_client or not self.voice_client.is_connected():
+            self.current_track = None
+            return
         file_path = self.download_track(track)
         if not file_path:
             logger.error("Failed to download track.")
             self.current_track = None
             return
-        source = discord.PCMVolumeTransformer(
-            discord.FFmpegPCMAudio(str(file_path)), volume=self.current_volume
-        )
+        source = TrackAudioSource(file_path, volume=self.current_volume)
         self.voice_client.play(
             source,
             after=lambda e: asyncio.run_coroutine_threadsafe(
@@ -81,6 +154,7 @@ class TidalCord(commands.Cog):
             ),
         )
         self.current_track = track
+        self.schedule_pre_download()
 
     def download_track(self, track: dict):
         cache_key = track["id"]
@@ -89,7 +163,14 @@ class TidalCord(commands.Cog):
         if not file_path:
             logger.info(f"Downloading track: {self.get_formatted_track(track)}")
             try:
-                url = track["url"]
+                url = track.get("url")
+                if url is None:
+                    # Tracks from the local index don't keep their expiring URL
+                    track_info = self.session.get_track_info_by_id(cache_key)
+                    if not track_info:
+                        logger.error(f"Failed to resolve track: {cache_key}")
+                        return
+                    url = track_info["url"]
                 response = requests.get(url, stream=True)
                 if response.status_code == 200:
                     file_path = self.cache.cache_dir / cache_key
@@ -103,8 +184,7 @@ class TidalCord(commands.Cog):
 
         return file_path
 
-    @tasks.loop(seconds=2)
-    async def pre_download_tracks_task(self):
+    async def pre_download_tracks(self):
         if not self.music_queue or self.current_track is None:
             return
         async with self.lock:
@@ -112,37 +192,57 @@ class TidalCord(commands.Cog):
                 if not self.download_track(track):
                     logger.error(f"Pre-downloading track: {track['title']}")
 
-    @tasks.loop(seconds=10)
-    async def auto_disconnect_empty_channel_task(self):
+    async def auto_disconnect_empty_channel(self):
         if self.voice_client and len(self.voice_client.channel.members) <= 1:
-            await self.voice_client.disconnect()
-            self.voice_client = None
+            await self.leave_voice_channel()
             logger.info("Disconnected due to an empty channel.")
-            self.auto_disconnect_empty_channel_task.stop()
-            self.auto_disconnect_no_track_task.cancel()
 
-    @tasks.loop(seconds=300)
-    async def auto_disconnect_no_track_task(self):
+    async def auto_disconnect_no_track(self):
         if self.voice_client and self.current_track is None:
-            await self.voice_client.disconnect()
-            self.voice_client = None
+            await self.leave_voice_channel()
             logger.info("Disconnected due to no track being played.")
-            self.auto_disconnect_empty_channel_task.stop()
-            self.auto_disconnect_no_track_task.stop()
 
-    async def start_auto_disconnect_no_track_task(self):
-        await asyncio.sleep(300)
-        self.auto_disconnect_no_track_task.start()
+    async def seek_to(self, ctx: commands.Context, position: float):
+        source = self.voice_client.source if self.voice_client else None
+        if self.current_track is None or not isinstance(source, TrackAudioSource):
+            await ctx.send("No track currently playing.")
+            return
+
+        track = self.current_track
+        if track["id"] not in self.cache:
+            await ctx.send("This track is no longer cached, so it can't be seeked.")
+            return
+        position = min(max(position, 0.0), max(track["duration"] - 1, 0))
+        was_paused = self.voice_client.is_paused()
+        self.voice_client.source = source.seek(position)
+        # The player thread may still be reading a frame from the old source
+        asyncio.get_running_loop().call_later(1, source.cleanup)
+        if was_paused:
+            self.voice_client.pause()
+        await ctx.send(
+            f"{ctx.author.name} moved the track to {self.format_duration(int(position))}."
+        )
 
     @staticmethod
-    def get_formatted_track(track: dict) -> str:
-        hours, remainder = divmod(track["duration"], 3600)
+    def parse_position(text: str) -> int:
+        seconds = 0
+        for part in text.split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+
+    @staticmethod
+    def format_duration(total_seconds: int) -> str:
+        hours, remainder = divmod(total_seconds, 3600)
         minutes, seconds = divmod(remainder, 60)
-        duration = (
+        return (
             f"{hours:02d}:{minutes:02d}:{seconds:02d}"
             if hours
             else f"{minutes:02d}:{seconds:02d}"
         )
+
+    @classmethod
+    def get_formatted_track(cls, track: dict) -> str:
+        duration = cls.format_duration(track["duration"])
         featured = (
             ""
             if not track["featured_artists"]
@@ -155,28 +255,57 @@ class TidalCord(commands.Cog):
         )
         return f"{track['artist']} - {track['title']}{featured if need_featured else ''} ({duration})"
 
+    @classmethod
+    def get_formatted_suggestion(cls, track: dict) -> str:
+        name = cls.get_formatted_track(track)
+        if track.get("album"):
+            name += f" [{track['album']}]"
+        # Discord rejects choice names longer than 100 characters
+        return name if len(name) <= 100 else name[:99] + "…"
+
+    def find_indexed_tracks(self, query: str, limit: int = 10):
+        # Cached tracks start instantly, so they are suggested first
+        results = self.track_index.search(
+            query, limit=limit, prefer=self.cache.__contains__
+        )
+        return [track for track, _ in results]
+
     # Commands
-    @commands.command(name="play", aliases=["p"])
+    @commands.hybrid_command(name="play", aliases=["p"])
     async def play(self, ctx: commands.Context, *, query: str = None):
+        # Slash invocations must be acknowledged within 3 seconds
+        await ctx.defer()
+
         if not await self.join_voice_channel(ctx):
             return
 
         if query is None:
-            await self.resume(ctx)
+            if self.voice_client and self.voice_client.is_paused():
+                await self.resume(ctx)
+            else:
+                await ctx.send("Nothing is paused. Add a song to play.")
             return
 
-        try:
-            track = self.urlhandler(query)
-            if track is None:
-                raise ValueError("No track was found.")
-        except ValueError:
-            tracks = self.session.search_tracks(query.lower(), limit=1)
-            if not tracks:
-                await ctx.send("No tracks found.")
-                return
-            track = tracks[0]
-
+        # Autocomplete suggestions are Tidal URLs of indexed tracks
+        track_id = TidalUrl.get_track_id(query)
+        track = self.track_index.get(track_id) if track_id else None
+        if track is None:
+            try:
+                track = self.urlhandler(query)
+                if track is None:
+                    raise ValueError("No track was found.")
+            except ValueError:
+                track = self.track_index.best_match(query)
+                if track is None:
+                    tracks = self.session.search_tracks(query.lower(), limit=1)
+                    if not tracks:
+                        await ctx.send("No tracks found.")
+                        return
+                    track = tracks[0]
+
+        self.track_index.add(track)
         self.music_queue.append(track)
+        self.schedule_pre_download()
         await ctx.send(
             f"{ctx.author.name} added **{self.get_formatted_track(track)}** to the queue."
         )
@@ -184,6 +313,16 @@ class TidalCord(commands.Cog):
         if self.current_track is None:
             await self.play_next()
 
+    @play.autocomplete("query")
+    async def play_autocomplete(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(
+                name=self.get_formatted_suggestion(track),
+                value=TidalUrl.get_track_url(track["id"]),
+            )
+            for track in self.find_indexed_tracks(current, limit=25)
+        ]
+
     @commands.command(name="search")
     async def search(self, ctx: commands.Context, *, query: str):
         if not await self.join_voice_channel(ctx):
@@ -224,7 +363,9 @@ class TidalCord(commands.Cog):
                 return
 
             selected_track = emoji_map[reaction.emoji]
+            self.track_index.add(selected_track)
             self.music_queue.append(selected_track)
+            self.schedule_pre_download()
             await ctx.send(
                 f"{ctx.author.name} added **{self.get_formatted_track(selected_track)}** to the queue."
             )
@@ -242,13 +383,36 @@ class TidalCord(commands.Cog):
 
     @commands.command(name="current", aliases=["now", "nowplaying", "playing"])
     async def current(self, ctx: commands.Context):
-        message = (
-            f"Current track: {self.get_formatted_track(self.current_track)}"
-            if self.current_track
-            else "No track currently playing."
-        )
+        if not self.current_track:
+            await ctx.send("No track currently playing.")
+            return
+        message = f"Current track: {self.get_formatted_track(self.current_track)}"
+        source = self.voice_client.source if self.voice_client else None
+        if isinstance(source, TrackAudioSource):
+            message += f" at {self.format_duration(int(source.position))}"
         await ctx.send(message)
 
+    @commands.command(name="seek")
+    async def seek(self, ctx: commands.Context, *, position: str):
+        try:
+            seconds = self.parse_position(position)
+        except ValueError:
+            await ctx.send("Position must be given as [[hh:]mm:]ss.")
+            return
+        await self.seek_to(ctx, seconds)
+
+    @commands.command(name="forward", aliases=["ff"])
+    async def forward(self, ctx: commands.Context, *, seconds: int = 10):
+        source = self.voice_client.source if self.voice_client else None
+        position = source.position if isinstance(source, TrackAudioSource) else 0
+        await self.seek_to(ctx, position + seconds)
+
+    @commands.command(name="rewind", aliases=["rw"])
+    async def rewind(self, ctx: commands.Context, *, seconds: int = 10):
+        source = self.voice_client.source if self.voice_client else None
+        position = source.position if isinstance(source, TrackAudioSource) else 0
+        await self.seek_to(ctx, position - seconds)
+
     @commands.command(name="queue", aliases=["q"])
     async def queue(self, ctx: commands.Context):
         message = (
@@ -320,8 +484,7 @@ class TidalCord(commands.Cog):
     @commands.has_guild_permissions(manage_guild=True)
     async def disconnect(self, ctx: commands.Context):
         if self.voice_client:
-            await self.voice_client.disconnect()
-            self.voice_client = None
+            await self.leave_voice_channel()
             await ctx.send("Disconnected from voice channel.")
 
     @commands.command(name="shutdown")
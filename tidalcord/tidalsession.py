@@ -87,5 +87,6 @@ class TidalSession:
                 for artist in track.artists
                 if artist.name != track.artist.name
             ],
+            "album": track.album.name if track.album else None,
             "duration": track.duration,
         }
@@ -0,0 +1,189 @@
+import heapq
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+from pathlib import Path
+
+
+class TrackIndex:
+    NGRAM_SIZE = 3
+    NORMALIZE_PATTERN = re.compile(r"[^\w\s]")
+    FIELDS = ("title", "artist", "featured_artists", "album", "duration")
+
+    def __init__(self, index_path: str):
+        self.index_path = Path(index_path)
+        self.journal_path = self.index_path.with_name(self.index_path.name + ".journal")
+        self.tracks = {}
+        self.postings = defaultdict(set)
+        self.title_postings = defaultdict(set)
+        self.title_sizes = {}
+        self.load()
+
+    def load(self):
+        if self.index_path.exists():
+            try:
+                with self.index_path.open("r", encoding="utf-8") as f:
+                    tracks = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                tracks = {}
+            if not isinstance(tracks, dict):
+                tracks = {}
+            for track_id, track in tracks.items():
+                if isinstance(track, dict):
+                    self._index(track_id, track)
+
+        if not self.journal_path.exists():
+            return
+        with self.journal_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-append
+                    continue
+                if not self._is_journal_entry(entry):
+                    continue
+                track_id, track = entry
+                self.remove(track_id)
+                self._index(track_id, track)
+        # Fold the journal back into the snapshot so it stays short
+        self.save()
+
+    def save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(self.tracks, f)
+        tmp_path.replace(self.index_path)
+        self.journal_path.unlink(missing_ok=True)
+
+    def add(self, track: dict):
+        track_id = track["id"]
+        entry = {field: track.get(field) for field in self.FIELDS}
+        if self.tracks.get(track_id) == entry:
+            return
+        self.remove(track_id)
+        self._index(track_id, entry)
+        # Appending one line keeps adds cheap regardless of the index size
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.journal_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps([track_id, entry]) + "\n")
+
+    def remove(self, track_id: str):
+        track = self.tracks.pop(track_id, None)
+        if track is None:
+            return
+        self._unpost(self.postings, self._document_grams(track), track_id)
+        self._unpost(self.title_postings, self._title_grams(track), track_id)
+        del self.title_sizes[track_id]
+
+    def get(self, track_id: str):
+        track = self.tracks.get(track_id)
+        if track is None:
+            return
+        return {"id": track_id, **track}
+
+    def search(
+        self, query: str, limit: int = 10, min_score: float = 0.5, prefer=None
+    ):
+        query_grams = self._grams(query)
+        if not query_grams:
+            return []
+
+        hits = self._count_hits(self.postings, query_grams)
+        title_hits = self._count_hits(self.title_postings, query_grams)
+
+        min_hits = math.ceil(min_score * len(query_grams))
+        results = []
+        for track_id, count in hits.items():
+            if count < min_hits:
+                continue
+            # Fraction of the query found anywhere in the track's metadata
+            containment = count / len(query_grams)
+            # Fraction of the title the query accounts for
+            title_size = self.title_sizes[track_id]
+            coverage = title_hits[track_id] / title_size if title_size else 0
+            # Rank on the same value best_match accepts on
+            confidence = min(containment, coverage)
+            preferred = bool(prefer(track_id)) if prefer else False
+            results.append((preferred, confidence, containment, track_id))
+
+        results = heapq.nlargest(limit, results, key=lambda r: r[:3])
+        return [
+            (self.get(track_id), confidence) for _, confidence, _, track_id in results
+        ]
+
+    def best_match(self, query: str, threshold: float = 0.9):
+        results = self.search(query, limit=2, min_score=threshold)
+        if not results or results[0][1] < threshold:
+            return
+        # Ambiguous, e.g. two different songs with the same title
+        if len(results) > 1 and results[1][1] >= threshold:
+            return
+        return results[0][0]
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _index(self, track_id: str, track: dict):
+        self.tracks[track_id] = track
+        for gram in self._document_grams(track):
+            self.postings[gram].add(track_id)
+        title_grams = self._title_grams(track)
+        for gram in title_grams:
+            self.title_postings[gram].add(track_id)
+        self.title_sizes[track_id] = len(title_grams)
+
+    @staticmethod
+    def _is_journal_entry(entry):
+        return (
+            isinstance(entry, list)
+            and len(entry) == 2
+            and isinstance(entry[0], str)
+            and isinstance(entry[1], dict)
+        )
+
+    @staticmethod
+    def _unpost(postings: dict, grams: set, track_id: str):
+        for gram in grams:
+            ids = postings.get(gram)
+            if ids is not None:
+                ids.discard(track_id)
+                if not ids:
+                    del postings[gram]
+
+    @staticmethod
+    def _count_hits(postings: dict, grams: set):
+        return Counter(chain.from_iterable(postings.get(gram, ()) for gram in grams))
+
+    @classmethod
+    def _title_grams(cls, track: dict):
+        return cls._grams(track.get("title") or "")
+
+    @classmethod
+    def _document_grams(cls, track: dict):
+        parts = [
+            track.get("title") or "",
+            track.get("artist") or "",
+            track.get("album") or "",
+            *(track.get("featured_artists") or []),
+        ]
+        grams = set()
+        for part in parts:
+            grams |= cls._grams(part)
+        return grams
+
+    @classmethod
+    def _normalize(cls, text: str):
+        return cls.NORMALIZE_PATTERN.sub(" ", text.casefold())
+
+    @classmethod
+    def _grams(cls, text: str):
+        n = cls.NGRAM_SIZE
+        grams = set()
+        for word in cls._normalize(text).split():
+            padded = f" {word} "
+            grams.update(padded[i : i + n] for i in range(len(padded) - n + 1))
+        return grams
@@ -9,10 +9,22 @@ from bs4 import BeautifulSoup, SoupStrainer
 class TidalUrl:
     NETLOCS = {"listen.tidal.com", "tidal.com"}
     TRACK_ID_PATTERN = re.compile(r"/(?:album/\d+/)?track/(\d+)")
+    TRACK_URL = "https://tidal.com/browse/track/{}"
 
     def __init__(self, session: TidalSession):
         self.session = session
 
+    @classmethod
+    def get_track_url(cls, track_id: str):
+        return cls.TRACK_URL.format(track_id)
+
+    @classmethod
+    def get_track_id(cls, url: str):
+        parsed = urlparse(url)
+        if parsed.netloc not in cls.NETLOCS:
+            return
+        return cls._extract_track_id(parsed.path)
+
     def handle_url(self, url: str):
         parsed = urlparse(url)
         track_id = self._extract_track_id(parsed.path)